@@ -0,0 +1,9 @@
+import multiprocessing
+
+bind = "0.0.0.0:8000"
+
+# UvicornWorker picks up uvloop + httptools automatically when installed,
+# which is noticeably faster than the default asyncio loop / h11 parser.
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = multiprocessing.cpu_count()
+worker_connections = 2000
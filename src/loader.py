@@ -1,20 +1,29 @@
 import pandas as pd
 import kagglehub
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+def _read_csv(csv_path):
+    """Reads one CSV, falling back to latin-1 on encoding errors."""
+    print(f">>> Loading file: {csv_path}")
+    try:
+        return pd.read_csv(csv_path)
+    except UnicodeDecodeError:
+        print(f">>> UTF-8 encoding error in {os.path.basename(csv_path)}. Trying 'latin-1'...")
+        return pd.read_csv(csv_path, encoding="latin-1")
 
 def get_data():
     """
     Downloads dataset path and then loads files manually.
     """
     print(">>> [Loader] Downloading dataset (files only)...")
-    
+
     # 1. Get ONLY the folder path (without trying to load into table)
     path = kagglehub.dataset_download("olistbr/brazilian-ecommerce")
-    
+
     print(f">>> Dataset located at: {path}")
-    
 
-    dfs={}
+
     files_to_load = {"orders" : "olist_orders_dataset.csv",
                     "items" : "olist_order_items_dataset.csv",
                     "products" : "olist_products_dataset.csv",
@@ -22,13 +31,14 @@ def get_data():
                     "sellers" : "olist_sellers_dataset.csv",
                     "locations" : "olist_geolocation_dataset.csv",
                     }
-    for key, file_name in files_to_load.items():
-        csv_path = os.path.join(path, file_name)
-        print(f">>> Loading file: {csv_path}")
-        try:
-            dfs[key] = pd.read_csv(csv_path)
-        except UnicodeDecodeError:
-            print(f">>> UTF-8 encoding error in {file_name}. Trying 'latin-1'...")
-            dfs[key] = pd.read_csv(csv_path, encoding="latin-1")
-    
-    return dfs
\ No newline at end of file
+
+    # 2. Read all files concurrently: pandas' C parser releases the GIL,
+    # so disk reads and parsing overlap instead of running one by one.
+    with ThreadPoolExecutor(max_workers=len(files_to_load)) as pool:
+        futures = {
+            key: pool.submit(_read_csv, os.path.join(path, file_name))
+            for key, file_name in files_to_load.items()
+        }
+        dfs = {key: future.result() for key, future in futures.items()}
+
+    return dfs
@@ -11,7 +11,8 @@ from fastapi.testclient import TestClient
 # Add project root to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.api import app
+import src.api as api_module
+from src.api import app, DeliveryEstimateRequest, PredictionEngine
 
 client = TestClient(app)
 
@@ -24,19 +25,30 @@ def mock_engine():
         mock_engine_instance.ready = True
         mock_engine_instance.record_count = 109635
         mock_engine_instance.metrics = {"r2": 0.4117, "mae": 4.36}
+        mock_engine_instance.health_summary = {
+            "status": "ready",
+            "records": 109635,
+            "r2_score": 0.4117,
+            "mae": 4.36,
+        }
+        mock_engine_instance.cache_hits = 0
+        mock_engine_instance.cache_misses = 0
         mock_engine_instance.features = [
             'product_weight_g', 'product_vol_cm3', 'distance_km',
             'customer_lat', 'customer_lng', 'seller_lat', 'seller_lng',
             'payment_lag_days', 'is_weekend_order', 'freight_value', 'purchase_month'
         ]
         
-        # Mock predict method
+        # Mock predict methods (the batcher resolves /predict via predict_many)
         mock_engine_instance.predict.return_value = 7.5
-        
+        mock_engine_instance.predict_many.side_effect = lambda payloads: [7.5] * len(payloads)
+
         # Mock describe_warnings method
         mock_engine_instance.describe_warnings.return_value = []
-        
-        yield mock_engine_instance
+
+        # The batcher captured the real engine at import time; point it at the mock too
+        with patch.object(api_module.batcher, 'engine', mock_engine_instance):
+            yield mock_engine_instance
 
 
 def test_root_endpoint():
@@ -133,4 +145,49 @@ def test_prediction_endpoint_invalid_coordinates():
     }
     
     response = client.post("/predict", json=payload)
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def test_describe_warnings_thresholds():
+    """Test warning messages for out-of-ordinary payload values."""
+    engine = PredictionEngine()
+    payload = DeliveryEstimateRequest(
+        product_weight_g=25000.0,   # > 20 kg
+        product_vol_cm3=60000.0,    # > 50000 cm³
+        distance_km=3500.0,         # > 3000 km
+        customer_lat=-23.55,
+        customer_lng=-46.63,
+        seller_lat=-23.95,
+        seller_lng=-46.33,
+        payment_lag_days=2.0,
+        is_weekend_order=False,
+        freight_value=600.0,        # > 500 BRL
+        purchase_month=11,
+    )
+
+    warnings = engine.describe_warnings(payload)
+    assert warnings == [
+        "very large distance (>3000 km)",
+        "very high weight (>20 kg)",
+        "very high shipping price (>500 BRL)",
+        "very large volume (>50000 cm³)",
+    ]
+
+
+def test_describe_warnings_clean_payload():
+    """Test that an ordinary payload produces no warnings."""
+    engine = PredictionEngine()
+    payload = DeliveryEstimateRequest(
+        product_weight_g=1200.0,
+        product_vol_cm3=4500.0,
+        distance_km=800.0,
+        customer_lat=-23.55,
+        customer_lng=-46.63,
+        seller_lat=-23.95,
+        seller_lng=-46.33,
+        payment_lag_days=2.0,
+        is_weekend_order=False,
+        freight_value=29.9,
+        purchase_month=11,
+    )
+
+    assert engine.describe_warnings(payload) == []